@@ -1,17 +1,68 @@
+import contextlib
+import functools
 import io
 import os
+import re
 import zipfile
-from unittest.mock import MagicMock, mock_open, patch
+from types import MappingProxyType
+from unittest.mock import MagicMock, Mock, mock_open, patch
 
 import pytest
+import requests
 
 import pandasai
-from pandasai.data_loader.semantic_layer_schema import Column, SemanticLayerSchema
+from pandasai.agent import Agent
+from pandasai.data_loader.semantic_layer_schema import (
+    Column,
+    SemanticLayerSchema,
+    Source,
+)
 from pandasai.dataframe.base import DataFrame
 from pandasai.exceptions import DatasetNotFound, InvalidConfigError, PandasAIApiKeyError
 from pandasai.helpers.filemanager import DefaultFileManager
-
-
+from pandasai.helpers.session import Session
+
+_MYSQL_CONN = {
+    "type": "mysql",
+    "connection": {
+        "host": "localhost",
+        "port": 3306,
+        "database": "test_db",
+        "user": "test_user",
+        "password": "test_password",
+    },
+    "table": "countries",
+}
+
+_POSTGRESQL_CONN = {
+    "type": "postgres",
+    "connection": {
+        "host": "localhost",
+        "port": 3306,
+        "database": "test_db",
+        "user": "test_user",
+        "password": "test_password",
+    },
+    "table": "countries",
+}
+
+_SQLITE_CONN = {"type": "sqlite", "path": "/path/to/database.db", "table": "countries"}
+
+_DESC_SCHEMA = SemanticLayerSchema(
+    name="test_dataset",
+    description="test_description",
+    source=Source(type="parquet", path="data.parquet"),
+)
+
+_RE_PATH_FORMAT = re.compile(r"Path must be in format 'organization/dataset'")
+_RE_ORG = re.compile(
+    r"Organization name must be lowercase and use hyphens instead of spaces"
+)
+_RE_DATASET = re.compile(r"Dataset path name must be lowercase")
+_RE_NAMES_REQUIRED = re.compile(r"Both organization and dataset names are required")
+
+
+@functools.lru_cache(maxsize=1)
 def create_test_zip():
     zip_buffer = io.BytesIO()
     with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
@@ -19,49 +70,47 @@ def create_test_zip():
     return zip_buffer.getvalue()
 
 
+@contextlib.contextmanager
+def _create_patches(df):
+    """Patch file writes, parquet export and project root lookup for create()."""
+    with contextlib.ExitStack() as stack:
+        mock_file = stack.enter_context(patch("builtins.open", mock_open()))
+        mock_to_parquet = stack.enter_context(patch.object(df, "to_parquet"))
+        stack.enter_context(
+            patch(
+                "pandasai.find_project_root", return_value=os.path.join("mock", "root")
+            )
+        )
+        yield mock_file, mock_to_parquet
+
+
 class TestPandasAIInit:
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def mysql_connection_json(self):
-        return {
-            "type": "mysql",
-            "connection": {
-                "host": "localhost",
-                "port": 3306,
-                "database": "test_db",
-                "user": "test_user",
-                "password": "test_password",
-            },
-            "table": "countries",
-        }
+        return MappingProxyType(_MYSQL_CONN)
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def postgresql_connection_json(self):
-        return {
-            "type": "postgres",
-            "connection": {
-                "host": "localhost",
-                "port": 3306,
-                "database": "test_db",
-                "user": "test_user",
-                "password": "test_password",
-            },
-            "table": "countries",
-        }
+        return MappingProxyType(_POSTGRESQL_CONN)
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def sqlite_connection_json(self):
-        return {"type": "sqlite", "path": "/path/to/database.db", "table": "countries"}
+        return MappingProxyType(_SQLITE_CONN)
 
-    def test_chat_creates_agent(self, sample_df):
-        with patch("pandasai.Agent") as MockAgent:
-            pandasai.chat("Test query", sample_df)
-            MockAgent.assert_called_once_with([sample_df], sandbox=None)
+    @pytest.fixture
+    def mock_agent(self, monkeypatch):
+        mock = MagicMock()
+        monkeypatch.setattr(pandasai, "Agent", mock)
+        return mock
 
-    def test_chat_sandbox_passed_to_agent(self, sample_df):
-        with patch("pandasai.Agent") as MockAgent:
-            sandbox = MagicMock()
-            pandasai.chat("Test query", sample_df, sandbox=sandbox)
-            MockAgent.assert_called_once_with([sample_df], sandbox=sandbox)
+    def test_chat_creates_agent(self, sample_df, mock_agent):
+        pandasai.chat("Test query", sample_df)
+        mock_agent.assert_called_once_with([sample_df], sandbox=None)
+
+    def test_chat_sandbox_passed_to_agent(self, sample_df, mock_agent):
+        sandbox = MagicMock()
+        pandasai.chat("Test query", sample_df, sandbox=sandbox)
+        mock_agent.assert_called_once_with([sample_df], sandbox=sandbox)
 
     def test_chat_without_dataframes_raises_error(self):
         with pytest.raises(ValueError, match="At least one dataframe must be provided"):
@@ -72,42 +121,35 @@ class TestPandasAIInit:
         with pytest.raises(ValueError, match="No existing conversation"):
             pandasai.follow_up("Follow-up query")
 
-    def test_follow_up_after_chat(self, sample_df):
-        with patch("pandasai.Agent") as MockAgent:
-            mock_agent = MockAgent.return_value
-            pandasai.chat("Test query", sample_df)
-            pandasai.follow_up("Follow-up query")
-            mock_agent.follow_up.assert_called_once_with("Follow-up query")
+    def test_follow_up_after_chat(self, sample_df, mock_agent):
+        mock_agent_instance = mock_agent.return_value
+        pandasai.chat("Test query", sample_df)
+        pandasai.follow_up("Follow-up query")
+        mock_agent_instance.follow_up.assert_called_once_with("Follow-up query")
 
-    def test_chat_with_multiple_dataframes(self, sample_dataframes):
-        with patch("pandasai.Agent") as MockAgent:
-            mock_agent_instance = MagicMock()
-            MockAgent.return_value = mock_agent_instance
-            mock_agent_instance.chat.return_value = "Mocked response"
+    def test_chat_with_multiple_dataframes(self, sample_dataframes, mock_agent):
+        mock_agent_instance = Mock(spec=Agent)
+        mock_agent.return_value = mock_agent_instance
+        mock_agent_instance.chat.return_value = "Mocked response"
 
-            result = pandasai.chat("What is the sum of column A?", *sample_dataframes)
+        result = pandasai.chat("What is the sum of column A?", *sample_dataframes)
 
-            MockAgent.assert_called_once_with(sample_dataframes, sandbox=None)
-            mock_agent_instance.chat.assert_called_once_with(
-                "What is the sum of column A?"
-            )
-            assert result == "Mocked response"
+        mock_agent.assert_called_once_with(sample_dataframes, sandbox=None)
+        mock_agent_instance.chat.assert_called_once_with("What is the sum of column A?")
+        assert result == "Mocked response"
 
-    def test_chat_with_single_dataframe(self, sample_dataframes):
-        with patch("pandasai.Agent") as MockAgent:
-            mock_agent_instance = MagicMock()
-            MockAgent.return_value = mock_agent_instance
-            mock_agent_instance.chat.return_value = "Mocked response"
+    def test_chat_with_single_dataframe(self, sample_dataframes, mock_agent):
+        mock_agent_instance = Mock(spec=Agent)
+        mock_agent.return_value = mock_agent_instance
+        mock_agent_instance.chat.return_value = "Mocked response"
 
-            result = pandasai.chat(
-                "What is the average of column X?", sample_dataframes[1]
-            )
+        result = pandasai.chat("What is the average of column X?", sample_dataframes[1])
 
-            MockAgent.assert_called_once_with([sample_dataframes[1]], sandbox=None)
-            mock_agent_instance.chat.assert_called_once_with(
-                "What is the average of column X?"
-            )
-            assert result == "Mocked response"
+        mock_agent.assert_called_once_with([sample_dataframes[1]], sandbox=None)
+        mock_agent_instance.chat.assert_called_once_with(
+            "What is the average of column X?"
+        )
+        assert result == "Mocked response"
 
     @patch("pandasai.helpers.path.find_project_root")
     @patch("os.path.exists")
@@ -132,10 +174,11 @@ class TestPandasAIInit:
     def test_load_dataset_not_found(self, mockenviron, mock_bytes_io, mock_zip_file):
         """Test loading when dataset does not exist locally and API returns not found."""
         mockenviron.return_value = {"PANDABI_API_URL": "localhost:8000"}
-        mock_request_session = MagicMock()
-        pandasai.get_PandasAI_session = mock_request_session
-        pandasai.get_PandasAI_session.return_value = MagicMock()
-        mock_request_session.get.return_value.status_code = 404
+        mock_response = Mock(spec=requests.Response)
+        mock_response.status_code = 404
+        mock_request_session = Mock(spec=Session)
+        mock_request_session.get.return_value = mock_response
+        pandasai.get_PandasAI_session = Mock(return_value=mock_request_session)
 
         dataset_path = "org/dataset-name"
 
@@ -158,8 +201,9 @@ class TestPandasAIInit:
     def test_load_missing_not_found(self, mock_session, mock_exists):
         """Test loading when API URL is missing."""
         mock_exists.return_value = False
-        mock_response = MagicMock()
+        mock_response = Mock(spec=requests.Response)
         mock_response.status_code = 404
+        mock_session.return_value = Mock(spec=Session)
         mock_session.return_value.get.return_value = mock_response
         dataset_path = "org/dataset-name"
 
@@ -167,10 +211,7 @@ class TestPandasAIInit:
             pandasai.load(dataset_path)
 
     def test_load_invalid_name(self):
-        with pytest.raises(
-            ValueError,
-            match="Organization name must be lowercase and use hyphens instead of spaces",
-        ):
+        with pytest.raises(ValueError, match=_RE_ORG):
             pandasai.load("test_test/data_set")
 
     @patch.dict(os.environ, {"PANDABI_API_KEY": "test-key"})
@@ -184,9 +225,10 @@ class TestPandasAIInit:
         """Test that load uses DEFAULT_API_URL when no URL is provided"""
         mock_root.return_value = "/tmp/test_project"
         mock_exists.return_value = False
-        mock_response = MagicMock()
+        mock_response = Mock(spec=requests.Response)
         mock_response.status_code = 200
         mock_response.content = create_test_zip()
+        mock_session.return_value = Mock(spec=Session)
         mock_session.return_value.get.return_value = mock_response
 
     @patch.dict(
@@ -203,9 +245,10 @@ class TestPandasAIInit:
         """Test that load uses custom URL from environment"""
         mock_root.return_value = "/tmp/test_project"
         mock_exists.return_value = False
-        mock_response = MagicMock()
+        mock_response = Mock(spec=requests.Response)
         mock_response.status_code = 200
         mock_response.content = create_test_zip()
+        mock_session.return_value = Mock(spec=Session)
         mock_session.return_value.get.return_value = mock_response
 
     def test_create_valid_dataset_no_params(
@@ -255,36 +298,20 @@ class TestPandasAIInit:
         with pytest.raises(InvalidConfigError):
             pandasai.create("test-org/test-dataset")
 
-    def test_create_invalid_path_format(self, sample_df):
-        """Test creating a dataset with invalid path format."""
-        with pytest.raises(
-            ValueError, match="Path must be in format 'organization/dataset'"
-        ):
-            pandasai.create("invalid_path", sample_df)
-
-    def test_create_invalid_org_name(self, sample_df):
-        """Test creating a dataset with invalid organization name."""
-        with pytest.raises(ValueError, match="Organization name must be lowercase"):
-            pandasai.create("Invalid-Org/test-dataset", sample_df)
-
-    def test_create_invalid_dataset_name(self, sample_df):
-        """Test creating a dataset with invalid dataset name."""
-        with pytest.raises(ValueError, match="Dataset path name must be lowercase"):
-            pandasai.create("test-org/Invalid-Dataset", sample_df)
-
-    def test_create_empty_org_name(self, sample_df):
-        """Test creating a dataset with empty organization name."""
-        with pytest.raises(
-            ValueError, match="Both organization and dataset names are required"
-        ):
-            pandasai.create("/test-dataset", sample_df)
-
-    def test_create_empty_dataset_name(self, sample_df):
-        """Test creating a dataset with empty dataset name."""
-        with pytest.raises(
-            ValueError, match="Both organization and dataset names are required"
-        ):
-            pandasai.create("test-org/", sample_df)
+    @pytest.mark.parametrize(
+        "path, match",
+        [
+            ("invalid_path", _RE_PATH_FORMAT),
+            ("Invalid-Org/test-dataset", _RE_ORG),
+            ("test-org/Invalid-Dataset", _RE_DATASET),
+            ("/test-dataset", _RE_NAMES_REQUIRED),
+            ("test-org/", _RE_NAMES_REQUIRED),
+        ],
+    )
+    def test_create_invalid_names(self, sample_df, path, match):
+        """Test creating a dataset with an invalid or incomplete path."""
+        with pytest.raises(ValueError, match=match):
+            pandasai.create(path, sample_df)
 
     @patch("pandasai.helpers.path.find_project_root")
     def test_create_existing_dataset(self, mock_find_project_root, sample_df, llm):
@@ -319,11 +346,7 @@ class TestPandasAIInit:
 
         with patch("os.path.exists", side_effect=mock_exists_side_effect), patch(
             "os.makedirs"
-        ) as mock_makedirs, patch(
-            "builtins.open", mock_open()
-        ) as mock_file, patch.object(sample_df, "to_parquet") as mock_to_parquet, patch(
-            "pandasai.find_project_root", return_value=os.path.join("mock", "root")
-        ):
+        ) as mock_makedirs, _create_patches(sample_df) as (mock_file, mock_to_parquet):
             result = pandasai.create("test-org/test-dataset", sample_df)
 
             # Verify dataset was created successfully
@@ -338,15 +361,8 @@ class TestPandasAIInit:
         self, sample_df, mock_loader_instance, mock_file_manager
     ):
         """Test creating a dataset with valid inputs."""
-
-        from pandasai.data_loader.semantic_layer_schema import Source
-
-        schema = SemanticLayerSchema(
-            name="test_dataset",
-            description="test_description",
-            source=Source(type="parquet", path="data.parquet"),
-        )
-        sample_df.schema = schema
+        # create() mutates the schema in place, so hand it a copy
+        sample_df.schema = _DESC_SCHEMA.model_copy()
 
         with patch.object(sample_df, "to_parquet") as mock_to_parquet:
             result = pandasai.create(
@@ -413,11 +429,7 @@ class TestPandasAIInit:
         """Test creating a dataset with valid inputs."""
         mock_find_project_root.return_value = os.path.join("mock", "root")
 
-        with patch("builtins.open", mock_open()) as mock_file, patch.object(
-            sample_df, "to_parquet"
-        ) as mock_to_parquet, patch(
-            "pandasai.find_project_root", return_value=os.path.join("mock", "root")
-        ):
+        with _create_patches(sample_df):
             columns_dict = [{"no-name": "a"}, {"name": "b"}]
 
             with pytest.raises(ValueError):
@@ -430,11 +442,7 @@ class TestPandasAIInit:
     ):
         """Test creating a dataset with valid inputs."""
 
-        with patch("builtins.open", mock_open()) as mock_file, patch.object(
-            sample_df, "to_parquet"
-        ) as mock_to_parquet, patch(
-            "pandasai.find_project_root", return_value=os.path.join("mock", "root")
-        ):
+        with _create_patches(sample_df):
             columns_dict = [{"name": "a"}, {"name": "b"}]
             result = pandasai.create(
                 "test-org/test-dataset",
@@ -456,11 +464,7 @@ class TestPandasAIInit:
     def test_create_valid_dataset_with_postgres(
         self, sample_df, mysql_connection_json, mock_loader_instance, mock_file_manager
     ):
-        with patch("builtins.open", mock_open()) as mock_file, patch.object(
-            sample_df, "to_parquet"
-        ) as mock_to_parquet, patch(
-            "pandasai.find_project_root", return_value=os.path.join("mock", "root")
-        ):
+        with _create_patches(sample_df):
             columns_dict = [{"name": "a"}, {"name": "b"}]
             result = pandasai.create(
                 "test-org/test-dataset",
@@ -500,9 +504,7 @@ class TestPandasAIInit:
     ):
         """Test creating a dataset with valid inputs."""
 
-        with patch("builtins.open", mock_open()) as mock_file, patch(
-            "pandasai.find_project_root", return_value=os.path.join("mock", "root")
-        ):
+        with _create_patches(sample_df):
             columns = [
                 {
                     "name": "parents.id",